@@ -1,38 +1,164 @@
-"""Update the CITATION.cff file for latest version."""
+"""
+Update the CITATION.cff file for latest version.
+
+The repository defaults to $GITHUB_REPOSITORY (set by GitHub Actions)
+and can be given explicitly::
+
+    python .github/scripts/update_citation.py --username scottprahl --repo ofiber
+"""
+import argparse
 import json
+import os
 import requests
 import yaml
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson parses the release payload faster than the standard library
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
-# Replace with your username and repo name
+# use the libyaml C implementation when available
+try:
+    from yaml import CSafeLoader as Loader, CSafeDumper as Dumper
+except ImportError:
+    from yaml import SafeLoader as Loader, SafeDumper as Dumper
+
+# fallback when not running inside GitHub Actions
 USERNAME = "scottprahl"
 REPO = "ofiber"
 
-# Fetch latest release date
-response = requests.get(f"https://api.github.com/repos/{USERNAME}/{REPO}/releases/latest")
-release_info = json.loads(response.text)
-release_date = release_info["published_at"].split("T")[0]
-version = release_info["tag_name"]
-
-# Read the existing CITATION.cff file
-with open("CITATION.cff", "r") as f:
-    cff_data = yaml.safe_load(f)
-
-# Create a flag to track if any change is made
-changed = False
-
-# Update the date-released field only if it's different
-if cff_data.get("date-released") != release_date:
-    cff_data["date-released"] = release_date
-    changed = True
-
-# Update the version field only if it's different
-if cff_data.get("version") != version:
-    cff_data["version"] = version
-    changed = True
-
-# Save the updated data back to CITATION.cff only if there was a change
-if changed:
-    with open("CITATION.cff", "w") as f:
-        yaml.dump(cff_data, f)
-else:
-    print("No change in release date or version. No update needed.")
+HEADERS = {"Accept": "application/vnd.github+json",
+           "X-GitHub-Api-Version": "2022-11-28"}
+
+# authenticated requests get the 5000/hr rate limit instead of 60/hr
+if os.environ.get("GITHUB_TOKEN"):
+    HEADERS["Authorization"] = f"Bearer {os.environ['GITHUB_TOKEN']}"
+
+CITATION_FILE = "CITATION.cff"
+
+# ETag, Last-Modified, and parsed fields from the previous run
+CACHE_FILE = ".github/cache/latest_release.json"
+
+
+def parse_args():
+    """Return the command line arguments."""
+    owner, _, repo = os.environ.get("GITHUB_REPOSITORY", "").partition("/")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--username",
+                        default=os.environ.get("GITHUB_REPOSITORY_OWNER", owner or USERNAME))
+    parser.add_argument("--repo", default=repo or REPO)
+    return parser.parse_args()
+
+
+def make_session():
+    """Return a keep-alive session that retries transient GitHub errors."""
+    retry = Retry(total=3, backoff_factor=0.5,
+                  status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset(["GET"]))
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.mount("https://", HTTPAdapter(max_retries=retry))
+    return session
+
+
+def read_cache(url):
+    """Return the cached release info for url or an empty dict."""
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("url") != url:
+        return {}
+    return cache
+
+
+def write_cache(cache):
+    """Save release info so the next run can make a conditional request."""
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    with open(CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+
+
+def get_release_date(session, username, repo):
+    """Return (release_date, version) of the latest GitHub release."""
+    url = f"https://api.github.com/repos/{username}/{repo}/releases/latest"
+    cache = read_cache(url)
+    headers = {}
+    if "etag" in cache:
+        headers["If-None-Match"] = cache["etag"]
+    if "last_modified" in cache:
+        headers["If-Modified-Since"] = cache["last_modified"]
+
+    response = session.get(url, headers=headers, timeout=10)
+
+    # nothing changed since last run, GitHub sends an empty 304 body
+    if response.status_code == 304 and "release_date" in cache:
+        return cache["release_date"], cache["version"]
+
+    response.raise_for_status()
+    release_info = json_loads(response.content)
+    release_date = release_info["published_at"].split("T")[0]
+    version = release_info["tag_name"]
+
+    cache = {"url": url, "release_date": release_date, "version": version}
+    if "ETag" in response.headers:
+        cache["etag"] = response.headers["ETag"]
+    if "Last-Modified" in response.headers:
+        cache["last_modified"] = response.headers["Last-Modified"]
+    if "etag" in cache or "last_modified" in cache:
+        write_cache(cache)
+
+    return release_date, version
+
+
+def write_atomic(path, data):
+    """Replace the contents of path without leaving a partial file behind."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def main():
+    """Update date-released and version in CITATION.cff."""
+    args = parse_args()
+    with make_session() as session:
+        release_date, version = get_release_date(session, args.username, args.repo)
+
+    # Read the existing CITATION.cff file
+    with open(CITATION_FILE, "rb") as f:
+        old_bytes = f.read()
+    cff_data = yaml.load(old_bytes, Loader=Loader)
+
+    # Create a flag to track if any change is made
+    changed = False
+
+    # Update the date-released field only if it's different
+    if cff_data.get("date-released") != release_date:
+        cff_data["date-released"] = release_date
+        changed = True
+
+    # Update the version field only if it's different
+    if cff_data.get("version") != version:
+        cff_data["version"] = version
+        changed = True
+
+    # Save the updated data back to CITATION.cff only if the bytes differ
+    # keep key order and avoid re-wrapping long lines so output is stable
+    new_bytes = old_bytes
+    if changed:
+        new_bytes = yaml.dump(cff_data, Dumper=Dumper, sort_keys=False,
+                              default_flow_style=False, allow_unicode=True,
+                              width=4096).encode("utf-8")
+    if new_bytes != old_bytes:
+        write_atomic(CITATION_FILE, new_bytes)
+    else:
+        print("No change in release date or version. No update needed.")
+
+
+if __name__ == "__main__":
+    main()
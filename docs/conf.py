@@ -14,19 +14,34 @@ docstrings that follow the Google docstring format.
 """
 import re
 import os.path
+import functools
 
 project = 'ofiber'
 master_doc = 'index'
 
+# matches the ' = "value"' that follows a property name
+_ASSIGNMENT_RE = re.compile(r'\s*=\s*[\'"]([^\'"]*)[\'"]')
 
-def get_init_property(prop):
-    """Return property from __init__.py."""
+
+@functools.lru_cache(maxsize=1)
+def _init_text():
+    """Return the contents of __init__.py."""
     here = os.path.abspath(os.path.dirname(__file__))
     file_name = os.path.join(here, '..', project, '__init__.py')
-    regex = r'{}\s*=\s*[\'"]([^\'"]*)[\'"]'.format(prop)
     with open(file_name, 'r', encoding='utf-8') as file:
-        result = re.search(regex, file.read())
-    return result.group(1)
+        return file.read()
+
+
+def get_init_property(prop):
+    """Return property from __init__.py."""
+    text = _init_text()
+    start = text.find(prop)
+    while start >= 0:
+        result = _ASSIGNMENT_RE.match(text, start + len(prop))
+        if result:
+            return result.group(1)
+        start = text.find(prop, start + 1)
+    raise ValueError('{} not found in __init__.py'.format(prop))
 
 
 release = get_init_property("__version__")
@@ -38,11 +38,50 @@ __copyright__ = '2018-24, Scott Prahl'
 __license__ = 'MIT'
 __url__ = 'https://github.com/scottprahl/ofiber'
 
-from .basics import *
-from .cylinder_step import *
-from .dispersion import *
-from .graded_index import *
-from .noise import *
-from .planar_parabolic import *
-from .planar_step import *
-from .refraction import *
+import importlib as _importlib
+
+# submodules are only imported when one of their names is first used
+_SUBMODULES = ('basics',
+               'cylinder_step',
+               'dispersion',
+               'graded_index',
+               'noise',
+               'planar_parabolic',
+               'planar_step',
+               'refraction')
+
+_NAME_TO_MODULE = {}
+
+
+def __getattr__(name):
+    """Import submodules and their public names on first access (PEP 562)."""
+    if name in _SUBMODULES:
+        return _importlib.import_module('.' + name, __name__)
+
+    if name == '__all__':
+        names = []
+        for sub in _SUBMODULES:
+            names.extend(__getattr__(sub).__all__)
+        globals()['__all__'] = names
+        return names
+
+    module = _NAME_TO_MODULE.get(name)
+    if module is None:
+        for sub in _SUBMODULES:
+            mod = __getattr__(sub)
+            for public in mod.__all__:
+                _NAME_TO_MODULE.setdefault(public, mod)
+            if name in mod.__all__:
+                module = mod
+                break
+        else:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """List the public names of all submodules."""
+    return sorted(set(globals()) | set(__getattr__('__all__')))
@@ -0,0 +1,510 @@
+# pylint: disable=invalid-name
+# pylint: disable=no-name-in-module
+# pylint: disable=no-member
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-locals
+# pylint: disable=duplicate-code
+"""
+Private helpers that find LP modes of step-index cylindrical waveguides.
+
+These are used by ofiber.cylinder_step and should not be needed elsewhere.
+The eigenvalue equation is eqn 8.40 of A. Ghatak, K. Thyagarajan, An
+Introduction to Fiber Optics, Cambridge University Press, 1998.
+
+Scalar roots are found with brenth on brackets between zeros of J_ell.
+Arrays of V are solved together with a vectorized Chandrupatla method, or
+Newton's method for the fundamental LP_01 mode.
+"""
+
+import functools
+import math
+import numpy as np
+import scipy.optimize
+from scipy import special
+from scipy.special import cython_special
+
+
+def _UW(V, b):
+    """
+    Calculate the core and cladding parameters U and W.
+
+    This is a private function and should not be needed outside this module.
+
+    Args:
+        V:      V-parameter for fiber            [-]
+        b:      normalized propagation constant  [-]
+
+    Returns:
+        tuple of U=V*sqrt(1-b) and W=V*sqrt(b)   [-]
+    """
+    return V * np.sqrt(1 - b), V * np.sqrt(b)
+
+
+def _LHS_eqn_8_40(b, V, ell):
+    """
+    Calculate the left hand side of the eigenvalue eqn 8.40 in Ghatak.
+
+    Also works for ell=0 (but is multiplied by -1 relative to eqn 8.41).
+    This is private method that should not be needed outside this module.
+
+    Args:
+        b:      normalized propagation constant  [-]
+        V:      V-parameter for fiber            [-]
+        ell:    desired fiber mode               [-]
+
+    Returns:
+        LHS of equation 8.40                     [-]
+    """
+    U = V * np.sqrt(1 - b)
+    return U * special.jv(ell - 1, U) / special.jv(ell, U)
+
+
+def _RHS_eqn_8_40(b, V, ell):
+    """
+    Calculate the right hand side of the eigenvalue eqn 8.40 in Ghatak.
+
+    Also works for ell=0 (but is multiplied by -1 relative to eqn 8.41).
+    This is private method that should not be needed outside this module.
+
+    Args:
+        b:      normalized propagation constant  [-]
+        V:      V-parameter for fiber            [-]
+        ell:    desired fiber mode               [-]
+
+    Returns:
+        RHS of equation 8.40                     [-]
+    """
+    W = V * np.sqrt(b)
+    # the exp(W) scaling cancels in the ratio and keeps large W from underflowing
+    return -W * special.kve(ell - 1, W) / special.kve(ell, W)
+
+
+def _cyl_mode_eqn(b, *args):
+    """
+    Return the difference of RHS and LHS of 8.40 in Ghatak.
+
+    This function is zero when a guided mode exists in the step index fiber.
+    This is a private function and should not be needed outside this module.
+    Unlike _LHS_eqn_8_40 and _RHS_eqn_8_40, b must be a scalar.
+
+    Args:
+        b:      normalized propagation constant  [-]
+        *args: two term array with arg[0] = V-parameter and arg[1]=desired fiber mode
+
+    Returns:
+        LHS-RHS of equation 8.40                 [-]
+    """
+    V = args[0]
+    ell = args[1]
+    # the root finder calls this with scalar b, so inline both sides and use
+    # the scalar cython_special entry points to skip the ufunc dispatch
+    U = V * math.sqrt(1 - b)
+    W = V * math.sqrt(b)
+    jd = cython_special.jv(ell, U)
+    if jd == 0:
+        return math.nan    # b is exactly on a pole
+    g1 = U * cython_special.jv(ell - 1, U) / jd
+    g2 = W * cython_special.kve(ell - 1, W) / cython_special.kve(ell, W)
+    return g1 + g2
+
+
+@functools.lru_cache(maxsize=None)
+def _jn_zeros(ell, n):
+    """
+    Return the first n zeros of the Bessel function J_ell.
+
+    The zeros only depend on ell and n and are needed for every root search,
+    so they are cached.  The returned array is read-only.
+
+    Args:
+        ell:    order of the Bessel function     [-]
+        n:      number of zeros                  [-]
+
+    Returns:
+        array of the first n zeros               [-]
+    """
+    jnz = special.jn_zeros(ell, n)
+    jnz.flags.writeable = False
+    return jnz
+
+
+def _triplet_orders(ell, x):
+    """
+    Return the orders ell-1, ell, ell+1 stacked along a new first axis.
+
+    The orders are shaped so that they broadcast against x.
+
+    Args:
+        ell:    order of the Bessel function     [-]
+        x:      argument of the Bessel function  [-]
+
+    Returns:
+        array of orders with shape (3, ...)      [-]
+    """
+    ell = np.asarray(ell)
+    pad = (1,) * max(np.ndim(x) - ell.ndim, 0)
+    return np.stack([ell - 1, ell, ell + 1]).reshape((3,) + pad + ell.shape)
+
+
+def _jv_triplet(ell, x):
+    """
+    Calculate J_{ell-1}(x), J_ell(x), and J_{ell+1}(x).
+
+    J_{ell+1} follows from the recurrence J_{n+1}(x) = 2n/x J_n(x) - J_{n-1}(x)
+    when x > ell+1.  For smaller x the upward recurrence loses accuracy, so
+    J_{ell+1} is evaluated directly wherever that happens.
+
+    Scalar arguments call jv separately for each order that is needed,
+    which is cheaper than building and broadcasting the stacked orders
+    used for arrays.
+
+    Args:
+        ell:    order of the Bessel function     [-]
+        x:      argument of the Bessel function  [-]
+
+    Returns:
+        tuple of the three Bessel functions      [-]
+    """
+    if np.isscalar(x) and np.isscalar(ell):
+        jm = special.jv(ell - 1, x)
+        j0 = special.jv(ell, x)
+        if abs(x) > abs(ell) + 1:
+            jp = 2 * ell / x * j0 - jm
+        else:
+            jp = special.jv(ell + 1, x)
+        return jm, j0, jp
+
+    jm, j0 = special.jv(_triplet_orders(ell, x)[:2], x)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        jp = 2 * ell / x * j0 - jm
+    unstable = np.abs(x) <= np.abs(ell) + 1
+    if np.any(unstable):
+        jp = np.where(unstable, special.jv(np.add(ell, 1), x), jp)[()]
+    return jm, j0, jp
+
+
+def _kve_triplet(ell, x):
+    """
+    Calculate exp(x) times K_{ell-1}(x), K_ell(x), and K_{ell+1}(x).
+
+    Only K_{ell-1} and K_ell are evaluated directly.  K_{ell+1} follows
+    from the recurrence K_{n+1}(x) = K_{n-1}(x) + 2n/x K_n(x), which is
+    stable in the upward direction.  (The matching recurrence for J is
+    only stable for x > ell+1, see _jv_triplet.)
+
+    The common exp(x) factor cancels in every ratio of these functions
+    and keeps them from underflowing to zero when x is large.
+
+    Args:
+        ell:    order of the Bessel function     [-]
+        x:      argument of the Bessel function  [-]
+
+    Returns:
+        tuple of the three Bessel functions      [-]
+    """
+    if np.isscalar(x) and np.isscalar(ell):
+        km = special.kve(ell - 1, x)
+        k0 = special.kve(ell, x)
+        if x != 0:
+            kp = km + 2 * ell / x * k0
+        else:
+            kp = special.kve(ell + 1, x)
+        return km, k0, kp
+
+    km, k0 = special.kve(_triplet_orders(ell, x)[:2], x)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kp = km + 2 * ell / x * k0
+    return km, k0, kp
+
+
+def _chandrupatla(f, a, b, fa, fb, *, xtol=2e-12, rtol=4 * np.finfo(float).eps, maxiter=100):
+    """
+    Find a root of f in each bracket [a, b] simultaneously.
+
+    This is a vectorized version of Chandrupatla's method (a bracketing
+    method that, like Brent's method, switches between bisection and
+    inverse quadratic interpolation).  All brackets are advanced together
+    and converged brackets are dropped so that f is evaluated only where
+    it is still needed.  This is a private function and should not be
+    needed outside this module.
+
+    Args:
+        f:      function f(x, idx) where idx selects the brackets in x  [-]
+        a:      1D array of lower bounds                               [-]
+        b:      1D array of upper bounds                               [-]
+        fa:     f at a, must have opposite sign to fb                   [-]
+        fb:     f at b                                                  [-]
+        xtol:   absolute tolerance in x                                 [-]
+        rtol:   relative tolerance in x                                 [-]
+        maxiter: maximum number of iterations                           [-]
+
+    Returns:
+        1D array of roots                                               [-]
+    """
+    root = np.full(np.shape(a), np.nan)
+    idx = np.arange(root.size)
+    c, fc = a, fa
+    t = np.full(root.shape, 0.5)
+
+    for _ in range(maxiter):
+        xt = a + t * (b - a)
+        ft = f(xt, idx)
+
+        # keep the root between a (newest point) and b
+        same = np.sign(ft) == np.sign(fa)
+        c, fc = np.where(same, a, b), np.where(same, fa, fb)
+        b, fb = np.where(same, b, a), np.where(same, fb, fa)
+        a, fa = xt, ft
+
+        smaller = np.abs(fa) < np.abs(fb)
+        xm = np.where(smaller, a, b)
+        with np.errstate(divide='ignore'):
+            tlim = (2 * rtol * np.abs(xm) + xtol / 2) / np.abs(b - c)
+
+        done = (np.where(smaller, fa, fb) == 0) | (tlim > 0.5)
+        root[idx[done]] = xm[done]
+        if done.all():
+            break
+
+        keep = ~done
+        idx, a, b, c, fa, fb, fc, tlim = (z[keep] for z in (idx, a, b, c, fa, fb, fc, tlim))
+
+        # inverse quadratic interpolation when it is safe, bisection otherwise
+        # (c == b or fc == fb give inf/nan here, which fail the iqi test)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xi = (a - b) / (c - b)
+            phi = (fa - fb) / (fc - fb)
+            iqi = (phi * phi < xi) & ((1 - phi) * (1 - phi) < 1 - xi)
+            t = fa / (fb - fa) * fc / (fb - fc)
+            t += (c - a) / (b - a) * fa / (fc - fa) * fb / (fc - fb)
+        t = np.clip(np.where(iqi, t, 0.5), tlim, 1 - tlim)
+    else:
+        root[idx] = xm[~done]
+
+    return root
+
+
+def _LP_mode_value_bounded(V, ell, lo, hi):
+    """
+    Find b for a mode of a circular step-index fiber within [lo, hi].
+
+    This is a private function and should not be needed outside this module.
+
+    Args:
+        V:      V-parameter for optical fiber    [-]
+        ell:    primary fiber mode (integer>=0)  [-]
+        lo:     lower bound for b                [-]
+        hi:     upper bound for b                [-]
+
+    Returns:
+        guided normalized propagation constant or None   [-]
+    """
+    if hi < lo:
+        return None  # no such mode
+
+    # no root when both ends have the same sign (or either end is nan),
+    # check here rather than letting the root finder raise
+    flo = _cyl_mode_eqn(lo, V, ell)
+    fhi = _cyl_mode_eqn(hi, V, ell)
+    if np.isnan(flo) or np.isnan(fhi) or flo * fhi > 0:
+        return None
+
+    # brenth needs fewer evaluations than brentq on this equation
+    return scipy.optimize.brenth(_cyl_mode_eqn, lo, hi, args=(V, ell))
+
+
+@functools.lru_cache(maxsize=4096)
+def _LP_mode_value(V, ell, em):
+    """
+    Calculate guided b for mode (ell,em) in a circular step-index fiber.
+
+    b is the normalized propagation constant.  Each guided mode in an optical
+    fiber has a specific value of b that depends on the fiber parameter V
+    and the mode number.
+
+    If no mode exists, a value of None is returned
+
+    Results are cached because the same root is often needed by several
+    functions (e.g., PetermannW and V_d2bV_by_V) for the same V.
+
+    The LP_lm is specified by the (ell,em) to avoid confusion between the
+    number 1 and the letter l.
+
+    For cylindrical fibers, em is a positive integer: thus there are modes
+    LP_01, LP_02, but not LP_10.
+
+    Args:
+        V:   V-parameter for optical fiber    [-]
+        ell: primary fiber mode   (integer)   [-]
+        em:  secondary fiber mode (integer>0) [-]
+
+    Returns:
+        guided normalized propagation constant for mode (ell,em)  [-]
+    """
+    if ell < 0:
+        ell *= -1   # negative ells are same as positive ones
+
+    if em <= 0:
+        return None    # modes start with 1, e.g., LP_01
+
+    if V <= 0:
+        return None    # V must be positive
+
+    abit = 1e-5
+
+    # set up bounds for this mode
+    jnz = _jn_zeros(ell, max(em, 10))
+    lo = max(0, 1 - (jnz[em - 1] / V)**2) + abit
+
+    if em == 1:
+        hi = 1 - abit
+    else:
+        hi = 1 - (jnz[em - 2] / V)**2 - abit
+
+    return _LP_mode_value_bounded(V, ell, lo, hi)
+
+
+def _LP_mode_value_array(V, ell, em):
+    """
+    Calculate guided b for mode (ell,em) for every value of V.
+
+    Unlike LP_mode_value(), modes that are not guided are returned as
+    np.nan so that the result can be used directly in array expressions.
+    For an array V, all the roots are found together rather than one
+    brenth call at a time.
+    This is a private function and should not be needed outside this module.
+
+    Args:
+        V:   V-parameter(s) for optical fiber  [-]
+        ell: primary fiber mode   (integer)   [-]
+        em:  secondary fiber mode (integer>0) [-]
+
+    Returns:
+        guided normalized propagation constant with the shape of V  [-]
+    """
+    if np.ndim(V) == 0:
+        # a single root is found faster (and cached) by the scalar solver
+        b = _LP_mode_value(float(V), ell, em)
+        return np.nan if b is None else b
+
+    V = np.asarray(V, dtype=float)
+    b = np.full(V.shape, np.nan)
+    if em > 0:
+        Vg = V[V > 0]
+        lo, hi = _LP_mode_brackets(Vg, abs(ell), em)
+        lo, hi = lo[:, -1], hi[:, -1]
+        bg = np.full(Vg.shape, np.nan)
+        if ell == 0 and em == 1:
+            bg = _LP01_mode_value(Vg, lo, hi)
+        todo = np.isnan(bg)
+        bg[todo] = _LP_mode_roots(Vg[todo], abs(ell), lo[todo], hi[todo])
+        b[V > 0] = bg
+    return b[()]
+
+
+def _LP01_mode_value(V, lo, hi, maxiter=20):
+    """
+    Find b for the fundamental LP_01 mode using Newton's method.
+
+    The starting point is the approximation U = (1+sqrt(2))V/(1+(4+V^4)^(1/4))
+    and for ell=0 the derivative of the mode equation is simply
+    V^2/2 [(J_1/J_0)^2 + (K_1/K_0)^2].  Iterates are kept within [lo, hi].
+    Points that have not converged after maxiter steps, or that are stuck
+    at a bound, are returned as np.nan so that a bracketing method can be
+    used for them instead.
+    This is a private function and should not be needed outside this module.
+
+    Args:
+        V:      1D array of V-parameters         [-]
+        lo:     lower bounds for b               [-]
+        hi:     upper bounds for b               [-]
+        maxiter: maximum number of iterations    [-]
+
+    Returns:
+        normalized propagation constant for LP_01 or np.nan  [-]
+    """
+    b = np.full(V.shape, np.nan)
+    idx = np.arange(V.size)
+    U = (1 + np.sqrt(2)) * V / (1 + (4 + V**4)**0.25)
+    x = np.clip(1 - (U / V)**2, lo, hi)
+
+    for _ in range(maxiter):
+        U = V * np.sqrt(1 - x)
+        W = V * np.sqrt(x)
+        jr = special.j1(U) / special.j0(U)
+        kr = special.k1e(W) / special.k0e(W)
+        step = (W * kr - U * jr) / (V * V / 2 * (jr * jr + kr * kr))
+        x_old = x
+        x = np.clip(x - step, lo, hi)
+
+        done = np.abs(step) < 1e-12
+        b[idx[done]] = x[done]
+
+        # an iterate pinned at a bound will not move again, so leave it nan
+        stuck = (x == x_old) & ((x == lo) | (x == hi))
+        keep = ~(done | stuck)
+        if not keep.any():
+            break
+        idx, V, lo, hi, x = (z[keep] for z in (idx, V, lo, hi, x))
+
+    return b
+
+
+def _LP_mode_roots(V, ell, lo, hi):
+    """
+    Find b for modes of a circular step-index fiber within [lo, hi].
+
+    This is the array version of _LP_mode_value_bounded().  Brackets that
+    are empty or have no sign change give np.nan.  This is a private
+    function and should not be needed outside this module.
+
+    Args:
+        V:      V-parameters for optical fiber   [-]
+        ell:    primary fiber mode(s) (integer>=0)  [-]
+        lo:     lower bounds for b               [-]
+        hi:     upper bounds for b               [-]
+
+    Returns:
+        guided normalized propagation constants or np.nan   [-]
+    """
+    b = np.full(np.shape(lo), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        flo = _LHS_eqn_8_40(lo, V, ell) - _RHS_eqn_8_40(lo, V, ell)
+        fhi = _LHS_eqn_8_40(hi, V, ell) - _RHS_eqn_8_40(hi, V, ell)
+    ok = (hi >= lo) & (flo * fhi <= 0)
+    if ok.any():
+        Vok = V[ok]
+        ell_ok = np.broadcast_to(ell, ok.shape)[ok]
+
+        def f(x, idx):
+            V_idx, ell_idx = Vok[idx], ell_ok[idx]
+            return _LHS_eqn_8_40(x, V_idx, ell_idx) - _RHS_eqn_8_40(x, V_idx, ell_idx)
+
+        b[ok] = _chandrupatla(f, lo[ok], hi[ok], flo[ok], fhi[ok])
+    return b
+
+
+def _LP_mode_brackets(V, ell, count):
+    """
+    Calculate the bounds on b for modes em=1..count of a step-index fiber.
+
+    The bounds come from consecutive zeros of J_ell.  This is a private
+    function and should not be needed outside this module.
+
+    Args:
+        V:      V-parameter(s) for optical fiber  [-]
+        ell:    primary fiber mode (integer>=0)   [-]
+        count:  number of modes em to bound       [-]
+
+    Returns:
+        arrays lo and hi with shape V.shape + (count,)   [-]
+    """
+    abit = 1e-5
+    jnz = _jn_zeros(ell, max(count, 10))[:count]
+    V = np.asarray(V)[..., np.newaxis]
+    with np.errstate(divide='ignore'):
+        lo = np.maximum(0, 1 - (jnz / V)**2) + abit
+        hi = np.empty_like(lo)
+        hi[..., 0] = 1 - abit
+        hi[..., 1:] = 1 - (jnz[:-1] / V)**2 - abit
+    return lo, hi
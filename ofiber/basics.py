@@ -33,6 +33,8 @@ And finally, some apply to graded index fibers where 'esi' is short for
     numerical_aperture_graded_index(n_core, n_clad, q, r_over_a)
 """
 
+import functools
+import math
 import numpy as np
 from scipy.special import jn_zeros
 
@@ -53,6 +55,42 @@ __all__ = ('acceptance_angle',
            'V_parameter')
 
 
+# first zero of J_ell for ell = 0, 1, ..., 7
+_VC_TABLE = (2.4048255576957724, 3.8317059702075125, 5.135622301840683,
+             6.380161895923984, 7.588342434503804, 8.771483815959954,
+             9.936109524217686, 11.086370019245084)
+
+
+def _sqrt(x):
+    """Square root that skips numpy dispatch for plain non-negative numbers."""
+    # np.float64 subclasses float, so check the exact type to keep numpy scalars
+    if type(x) in (int, float) and x >= 0:
+        return math.sqrt(x)
+    return np.sqrt(x)
+
+
+def _arcsin(x):
+    """Arcsine that skips numpy dispatch for plain numbers in [-1, 1]."""
+    if type(x) in (int, float) and -1 <= x <= 1:
+        return math.asin(x)
+    return np.arcsin(x)
+
+
+def _abs2(r):
+    """Squared magnitude that skips the complex modulus for real values."""
+    if np.iscomplexobj(r):
+        return abs(r)**2
+    return r * r
+
+
+@functools.lru_cache(maxsize=32)
+def _first_jn_zero(ell):
+    """Return the first zero of the Bessel function J_ell."""
+    if 0 <= ell < len(_VC_TABLE):
+        return _VC_TABLE[ell]
+    return float(jn_zeros(ell, 1)[0])
+
+
 def acceptance_angle(NA, n_outside=1):
     """
     Find the acceptance angle for a cone of light in/out of an optical fiber.
@@ -70,7 +108,7 @@ def acceptance_angle(NA, n_outside=1):
     Returns:
         maximum entrance/exit half-angle of the fiber [radians]
     """
-    return np.arcsin(NA / n_outside)
+    return _arcsin(NA / n_outside)
 
 
 def critical_angle(n_core, n_clad):
@@ -84,7 +122,7 @@ def critical_angle(n_core, n_clad):
     Returns:
         angle of total internal reflection [radians]
     """
-    return np.arcsin(n_clad / n_core)
+    return _arcsin(n_clad / n_core)
 
 
 def cutoff_wavelength(a, NA, ell=0, q=np.inf):
@@ -108,10 +146,10 @@ def cutoff_wavelength(a, NA, ell=0, q=np.inf):
     Returns:
         shortest wavelength for operation in the specified mode [m]
     """
-    Vc, = jn_zeros(int(ell), 1)
+    Vc = _first_jn_zero(int(ell))
     if np.isfinite(q):       # graded index fiber
-        Vc *= np.sqrt(1 + 2 / q)
-    return 2 * np.pi * a * NA / Vc
+        Vc *= math.sqrt(1 + 2 / q)
+    return 2 * math.pi * a * NA / Vc
 
 
 def esi_Delta(Delta, q):
@@ -153,7 +191,7 @@ def esi_V_parameter(V, q):
     Returns:
         equivalent step index V-parameter           [-]
     """
-    return V * np.sqrt(q / (q + 2))
+    return V * _sqrt(q / (q + 2))
 
 
 def numerical_aperture(n_core, n_clad):
@@ -167,7 +205,13 @@ def numerical_aperture(n_core, n_clad):
     Returns:
         numerical aperture                                      [-]
     """
-    return np.sqrt(n_core**2 - n_clad**2)
+    if isinstance(n_core, np.ndarray) or isinstance(n_clad, np.ndarray):
+        diff = np.subtract(np.square(n_core), np.square(n_clad))
+        # reuse a real floating difference array for the square root
+        if diff.dtype.kind == 'f':
+            return np.sqrt(diff, out=diff)
+        return np.sqrt(diff)
+    return _sqrt(n_core**2 - n_clad**2)
 
 
 def numerical_aperture_from_Delta(n_core, Delta):
@@ -183,7 +227,7 @@ def numerical_aperture_from_Delta(n_core, Delta):
     Returns:
         numerical aperture                                      [-]
     """
-    return n_core * np.sqrt(2 * Delta)
+    return n_core * _sqrt(2 * Delta)
 
 
 def numerical_aperture_graded_index(n_core, n_clad, q, r_over_a):
@@ -202,7 +246,18 @@ def numerical_aperture_graded_index(n_core, n_clad, q, r_over_a):
     Returns:
         numerical aperture at r_over_a                           [-]
     """
-    return np.sqrt(n_core**2 - n_clad**2) * np.sqrt(1 - r_over_a**q)
+    NA = numerical_aperture(n_core, n_clad)
+    if np.isscalar(q) and q == 2:    # parabolic profile, avoid pow
+        profile = r_over_a * r_over_a
+    else:
+        profile = r_over_a**q
+
+    # profile is a fresh array here, so work in place
+    if isinstance(profile, np.ndarray) and profile.dtype.kind == 'f':
+        np.subtract(1, profile, out=profile)
+        np.sqrt(profile, out=profile)
+        return NA * profile
+    return NA * np.sqrt(1 - profile)
 
 
 def relative_refractive_index(n_core, n_clad):
@@ -237,7 +292,8 @@ def R_par(m, theta):
     c = np.cos(theta)
     s = np.sin(theta)
     d = np.sqrt(m2 - s * s)
-    return abs((m2 * c - d) / (m2 * c + d))**2
+    r = (m2 * c - d) / (m2 * c + d)
+    return _abs2(r)
 
 
 def R_per(m, theta):
@@ -258,7 +314,8 @@ def R_per(m, theta):
     c = np.cos(theta)
     s = np.sin(theta)
     d = np.sqrt(m2 - s * s)
-    return abs((c - d) / (c + d))**2
+    r = (c - d) / (c + d)
+    return _abs2(r)
 
 
 def R_unpolarized(m, theta):
@@ -275,7 +332,15 @@ def R_unpolarized(m, theta):
     Returns:
         reflected power                       [-]
     """
-    return (R_par(m, theta) + R_per(m, theta)) / 2
+    # share cos, sin, and sqrt between the two polarizations
+    m2 = m * m
+    c = np.cos(theta)
+    s = np.sin(theta)
+    d = np.sqrt(m2 - s * s)
+    m2c = m2 * c
+    r_par = _abs2((m2c - d) / (m2c + d))
+    r_per = _abs2((c - d) / (c + d))
+    return (r_par + r_per) / 2
 
 
 def V_parameter(a, NA, lambda0):
@@ -290,5 +355,5 @@ def V_parameter(a, NA, lambda0):
     Returns:
         V-parameter                                [-]
     """
-    V = 2 * np.pi / lambda0 * a * NA
+    V = 2 * math.pi / lambda0 * a * NA
     return V
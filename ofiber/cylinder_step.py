@@ -3,6 +3,7 @@
 # pylint: disable=consider-using-f-string
 # pylint: disable=too-many-arguments
 # pylint: disable=no-member
+# pylint: disable=too-many-locals
 
 """
 Useful routines for step-index cylindrical waveguides.
@@ -17,9 +18,11 @@ Functions to calculate and plot modes for step index fibers.  Specifically::
 
     LP_mode_value(V, ell, em)
     LP_mode_values(V, ell)
+    LP_mode_sweep(V, ell_max=8)
     LP_core_irradiance(V, b, ell)
     LP_clad_irradiance(V, b, ell)
     LP_total_irradiance(V, b, ell)
+    LP_irradiances(V, b, ell)
     LP_radial_field(V, b, ell, r_over_a)
     LP_radial_irradiance(V, b, ell, r_over_a)
     gaussian_envelope_Omega(V)
@@ -51,107 +54,52 @@ import numpy as np
 import matplotlib.pyplot as plt
 import scipy.optimize
 from scipy import special
+from ofiber._lp_modes import (_UW, _LHS_eqn_8_40, _RHS_eqn_8_40, _jn_zeros,
+                              _jv_triplet, _kve_triplet, _LP_mode_value,
+                              _LP_mode_value_array, _LP_mode_value_bounded,
+                              _LP_mode_roots, _LP_mode_brackets)
+# the far-field notebook uses ofiber.cylinder_step._cyl_mode_eqn directly
+from ofiber._lp_modes import _cyl_mode_eqn  # noqa: F401 pylint: disable=unused-import
+
+__all__ = ('LP_mode_value',
+           'LP_mode_values',
+           'LP_mode_sweep',
+           'plot_LP_modes',
+           'LP_core_irradiance',
+           'LP_clad_irradiance',
+           'LP_total_irradiance',
+           'LP_irradiances',
+           'LP_radial_field',
+           'LP_radial_irradiance',
+           'gaussian_envelope_Omega',
+           'gaussian_radial_irradiance',
+           'transverse_misalignment_loss_db',
+           'angular_misalignment_loss_db',
+           'longitudinal_misalignment_loss_db',
+           'bending_loss_db',
+           'MFR',
+           'MFD',
+           'PetermannW',
+           'PetermannW_Approx',
+           'V_d2bV_by_V',
+           'V_d2bV_by_V_Approx',
+           'FF_polar_irradiance_x',
+           'FF_irradiance_x',
+           'FF_node_polar_angle',
+           )
 
-_all_ = ('LP_mode_value',
-         'LP_mode_values',
-         'plot_LP_modes',
-         'LP_core_irradiance',
-         'LP_clad_irradiance',
-         'LP_total_irradiance',
-         'LP_radial_field',
-         'LP_radial_irradiance',
-         'gaussian_envelope_Omega',
-         'gaussian_radial_irradiance',
-         'transverse_misalignment_loss_db',
-         'angular_misalignment_loss_db',
-         'longitudinal_misalignment_loss_db',
-         'bending_loss_db',
-         'MFR',
-         'MFD',
-         'PetermannW',
-         'PetermannW_Approx',
-         'V_d2bV_by_V',
-         'V_d2bV_by_V_Approx',
-         'FF_polar_irradiance_x',
-         'FF_irradiance_x',
-         'FF_node_polar_angle',
-         )
-
-
-def _LHS_eqn_8_40(b, V, ell):
-    """
-    Calculate the left hand side of the eigenvalue eqn 8.40 in Ghatak.
-
-    Also works for ell=0 (but is multiplied by -1 relative to eqn 8.41).
-    This is private method that should not be needed outside this module.
 
-    Args:
-        b:      normalized propagation constant  [-]
-        V:      V-parameter for fiber            [-]
-        ell:    desired fiber mode               [-]
-
-    Returns:
-        LHS of equation 8.40                     [-]
-    """
-    U = V * np.sqrt(1 - b)
-    return U * special.jv(ell - 1, U) / special.jv(ell, U)
-
-
-def _RHS_eqn_8_40(b, V, ell):
-    """
-    Calculate the right hand side of the eigenvalue eqn 8.40 in Ghatak.
-
-    Also works for ell=0 (but is multiplied by -1 relative to eqn 8.41).
-    This is private method that should not be needed outside this module.
-
-    Args:
-        b:      normalized propagation constant  [-]
-        V:      V-parameter for fiber            [-]
-        ell:    desired fiber mode               [-]
-
-    Returns:
-        RHS of equation 8.40                     [-]
-    """
-    W = V * np.sqrt(b)
-    return -W * special.kn(ell - 1, W) / special.kn(ell, W)
-
-
-def _cyl_mode_eqn(b, *args):
-    """
-    Return the difference of RHS and LHS of 8.40 in Ghatak.
-
-    This function is zero when a guided mode exists in the step index fiber.
-    This is a private function and should not be needed outside this module.
-
-    Args:
-        b:      normalized propagation constant  [-]
-        *args: two term array with arg[0] = V-parameter and arg[1]=desired fiber mode
-
-    Returns:
-        LHS-RHS of equation 8.40                 [-]
-    """
-    V = args[0]
-    ell = args[1]
-    g1 = _LHS_eqn_8_40(b, V, ell)
-    g2 = _RHS_eqn_8_40(b, V, ell)
-    return g1 - g2
-
-
-def _LP_mode_value(V, ell, em):
+def LP_mode_value(V, ell, em):
     """
     Calculate guided b for mode (ell,em) in a circular step-index fiber.
 
     b is the normalized propagation constant.  Each guided mode in an optical
     fiber has a specific value of b that depends on the fiber parameter V
-    and the mode number.
-
-    If no mode exists, a value of None is returned
-
-    The LP_lm is specified by the (ell,em) to avoid confusion between the
-    number 1 and the letter l.
+    and the mode numbers ell and em.
 
-    For cylindrical fibers, em is a positive integer: thus there are modes
-    LP_01, LP_02, but not LP_10.
+    V, ell, and em may be arrays that broadcast together.  When any of them
+    is an array, modes that are not guided are returned as np.nan.  For
+    scalar arguments, None is returned if the mode is not guided.
 
     Args:
         V:   V-parameter for optical fiber    [-]
@@ -161,105 +109,112 @@ def _LP_mode_value(V, ell, em):
     Returns:
         guided normalized propagation constant for mode (ell,em)  [-]
     """
-    if ell < 0:
-        ell *= -1   # negative ells are same as positive ones
-
-    if em <= 0:
-        return None    # modes start with 1, e.g., LP_01
-
-    if V <= 0:
-        return None    # V must be positive
-
-    abit = 1e-5
-
-    # set up bounds for this mode
-    jnz = special.jn_zeros(ell, em)
-    lo = max(0, 1 - (jnz[em - 1] / V)**2) + abit
-
-    if em == 1:
-        hi = 1 - abit
-    else:
-        hi = 1 - (jnz[em - 2] / V)**2 - abit
-
-    if hi < lo:
-        return None  # no such mode
+    if np.isscalar(V) and np.isscalar(ell) and np.isscalar(em):
+        if em < 1:
+            raise ValueError("The mode number 'em' must be one or greater.")
+        return _LP_mode_value(V, ell, em)
 
-    try:
-        b = scipy.optimize.brentq(_cyl_mode_eqn, lo, hi, args=(V, ell))
-    except ValueError:  # happens when both hi and lo values have same sign
-        return None     # therefore no such mode exists
+    V, ell, em = np.broadcast_arrays(np.asarray(V, dtype=float), ell, em)
+    if np.any(em < 1):
+        raise ValueError("The mode number 'em' must be one or greater.")
 
-    return b
+    # solve all the V values for each distinct mode together
+    b = np.empty(V.shape)
+    for ll, mm in np.unique(np.stack((ell.ravel(), em.ravel())), axis=1).T:
+        mode = (ell == ll) & (em == mm)
+        b[mode] = _LP_mode_value_array(V[mode], int(ll), int(mm))
+    return b[()]
 
 
-def LP_mode_value(V, ell, em):
+def LP_mode_values(V, ell):
     """
-    Calculate guided b for mode (ell,em) in a circular step-index fiber.
+    Calculate all guided b for mode ell in a circular step-index fiber.
 
-    b is the normalized propagation constant.  Each guided mode in an optical
-    fiber has a specific value of b that depends on the fiber parameter V
-    and the mode numbers ell and em.
+    If there is no such mode, returns an empty array
 
-    This is a wrapper function that handles V, ell, or em being possible
-    arrays.  See `LP_mode_value` for details.
+    Note that in the returned array b[0] will correspond to LP_ell,1
+
+    If V is an array, then the result has one more dimension than V
+    and b[i, em - 1] is the value for V[i] and mode LP_ell,em.  Modes that
+    are not guided are filled with np.nan.
 
     Args:
         V:   V-parameter for optical fiber    [-]
         ell: primary fiber mode   (integer)   [-]
-        em:  secondary fiber mode (integer>0) [-]
 
     Returns:
-        guided normalized propagation constant for mode (ell,em)  [-]
+        array of normalized propagation constant for mode ell  [-]
     """
-    if em < 1:
-        raise ValueError("The mode number 'em' must be one or greater.")
-
-    if np.isscalar(V) + np.isscalar(ell) + np.isscalar(em) < 2:
-        raise ValueError("only one of V, ell, and em can be an array")
+    ell = abs(ell)
 
     if not np.isscalar(V):
-        b = np.zeros_like(V)
-        for i, VV in enumerate(V):
-            b[i] = LP_mode_value(VV, ell, em)
-        return b
+        V = np.asarray(V, dtype=float)
+        lo, hi = _LP_mode_brackets(V, ell, 9)
+        all_b = np.full(lo.shape, np.nan)
+        guided = V > 0
+        lo, hi = lo[guided], hi[guided]
+        b = _LP_mode_roots(np.broadcast_to(V[guided][:, np.newaxis], lo.shape), ell, lo, hi)
+
+        # as in the scalar case, stop at the first mode that is not guided
+        b[np.cumsum(np.isnan(b), axis=-1) > 0] = np.nan
+        all_b[guided] = b
+        return all_b
 
-    if not np.isscalar(ell):
-        b = np.zeros_like(ell)
-        for i, ll in enumerate(ell):
-            b[i] = LP_mode_value(V, ll, em)
-        return b
+    if V <= 0:
+        return np.array([])
 
-    if not np.isscalar(em):
-        b = np.zeros_like(em)
-        for i, mm in enumerate(em):
-            b[i] = LP_mode_value(V, ell, mm)
-        return b
+    # bounds for all modes em=1..9 from one set of Bessel zeros
+    lo, hi = _LP_mode_brackets(V, ell, 9)
 
-    return _LP_mode_value(V, ell, em)
+    all_b = np.empty(9)
+    n = 0
+    for em in range(9):
+        b = _LP_mode_value_bounded(V, ell, lo[em], hi[em])
+        if b is None:
+            break
+        all_b[n] = b
+        n += 1
 
+    return all_b[:n].copy()
 
-def LP_mode_values(V, ell):
+
+def LP_mode_sweep(V, ell_max=8):
     """
-    Calculate all guided b for mode ell in a circular step-index fiber.
+    Calculate all guided b for modes ell=0..ell_max in a step-index fiber.
 
-    If there is no such mode, returns an empty array
+    This gives the same values as stacking LP_mode_values(V, ell) for each
+    ell, but all the modes for all the V values are found in a single
+    vectorized root search.
 
-    Note that in the returned array b[0] will correspond to LP_ell,1
+    The result has two more dimensions than V and b[..., ell, em - 1] is
+    the value for mode LP_ell,em.  Modes that are not guided are filled
+    with np.nan.
 
     Args:
-        V:   V-parameter for optical fiber    [-]
-        ell: primary fiber mode   (integer)   [-]
+        V:       V-parameter(s) for optical fiber  [-]
+        ell_max: largest primary fiber mode        [-]
 
     Returns:
-        array of normalized propagation constant for mode ell  [-]
+        array of normalized propagation constants  [-]
     """
-    all_b = np.array([])
-    for em in range(1, 10):
-        b = LP_mode_value(V, ell, em)
-        if b is None:
-            break
-        all_b = np.append(all_b, b)
+    V = np.asarray(V, dtype=float)
+    ells = np.arange(abs(ell_max) + 1)
+
+    # bounds for every (ell, em) pair from the cached Bessel zeros
+    brackets = [_LP_mode_brackets(V, ell, 9) for ell in ells]
+    lo = np.stack([bracket[0] for bracket in brackets], axis=-2)
+    hi = np.stack([bracket[1] for bracket in brackets], axis=-2)
 
+    all_b = np.full(lo.shape, np.nan)
+    guided = V > 0
+    lo, hi = lo[guided], hi[guided]
+    V = np.broadcast_to(V[guided][:, np.newaxis, np.newaxis], lo.shape)
+    ell = np.broadcast_to(ells[:, np.newaxis], lo.shape)
+    b = _LP_mode_roots(V, ell, lo, hi)
+
+    # as in LP_mode_values, stop at the first mode that is not guided
+    b[np.cumsum(np.isnan(b), axis=-1) > 0] = np.nan
+    all_b[guided] = b
     return all_b
 
 
@@ -281,23 +236,37 @@ def plot_LP_modes(V, ell):
     pltmin = -2 * V
     pltmax = 2 * V
 
-    b = np.linspace(abit, 1 - abit, 251)
-
-    g1 = _LHS_eqn_8_40(b, V, ell)
+    # the LHS has a pole wherever J_ell(U)=0, so sample each branch
+    # separately with points clustered towards its ends
+    jnz = _jn_zeros(abs(ell), max(int(V / np.pi) + 2, 10))
+    poles = np.sort(1 - (jnz[jnz < V] / V)**2)
+    poles = poles[(poles > abit) & (poles < 1 - abit)]
+    edges = np.concatenate(([abit], poles, [1 - abit]))
+    t = (1 - np.cos(np.linspace(0, np.pi, 50, endpoint=False))) / 2
+    b = edges[:-1, np.newaxis] + np.diff(edges)[:, np.newaxis] * t
+    b = np.append(b.ravel(), 1 - abit)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        g1 = _LHS_eqn_8_40(b, V, ell)
     g2 = _RHS_eqn_8_40(b, V, ell)
 
+    # J_ell(U) vanishes at the poles, so the sign of g1 there is just noise
+    g1[np.isin(b, poles)] = np.nan
+
+    # the curves cross on the smooth RHS, so interpolate it for the labels
+    all_b = LP_mode_values(V, ell)
+    all_y = np.interp(all_b, b, g2)
+
     # remove points so confusing vertical retrace lines are not shown
-    np.place(g1, g1 < pltmin, np.nan)
-    np.place(g2, g2 < pltmin, np.nan)
+    g1[g1 < pltmin] = np.nan
+    g2[g2 < pltmin] = np.nan
 
     plt.plot([0, 1], [0, 0], ':k')
     plt.plot(b, g1)
     plt.plot(b, g2)
 
     # plot and label all the crossings
-    all_b = LP_mode_values(V, ell)
-    for i, bb in enumerate(all_b):
-        y = _LHS_eqn_8_40(bb, V, ell)
+    for i, (bb, y) in enumerate(zip(all_b, all_y)):
         plt.scatter([bb], [y], s=30)
         plt.annotate(r'   LP$_{%d%d}$' % (ell, i + 1), xy=(bb, y), va='top')
 
@@ -325,7 +294,8 @@ def LP_core_irradiance(V, b, ell):
         total core power over core area          [-]
     """
     U = V * np.sqrt(1 - b)
-    return 1 - special.jv(ell + 1, U) * special.jv(ell - 1, U) / special.jv(ell, U)**2
+    jm, j0, jp = _jv_triplet(ell, U)
+    return 1 - jp * jm / j0**2
 
 
 def LP_clad_irradiance(V, b, ell):
@@ -344,7 +314,8 @@ def LP_clad_irradiance(V, b, ell):
         total cladding power over core area      [-]
     """
     W = V * np.sqrt(b)
-    return special.kn(ell + 1, W) * special.kn(ell - 1, W) / special.kn(ell, W)**2 - 1
+    km, k0, kp = _kve_triplet(ell, W)
+    return kp * km / k0**2 - 1
 
 
 def LP_total_irradiance(V, b, ell):
@@ -362,11 +333,62 @@ def LP_total_irradiance(V, b, ell):
     Returns:
         total power over core area               [-]
     """
-    U = V * np.sqrt(1 - b)
-    W = V * np.sqrt(b)
-    val = V**2 / U**2 * special.kn(ell + 1, W)
-    val *= special.kn(ell - 1, W) / special.kn(ell, W)**2
-    return val
+    U, W = _UW(V, b)
+    km, k0, kp = _kve_triplet(ell, W)
+    return _LP_total_from_bessels(V, U, km, k0, kp)
+
+
+def _LP_total_from_bessels(V, U, km, k0, kp):
+    """
+    Calculate the total irradiance from already evaluated K Bessel functions.
+
+    Only ratios of the K functions appear, so they may share a common
+    scale factor such as the exp(W) of special.kve.
+    This is a private function and should not be needed outside this module.
+
+    Args:
+        V:      V-parameter for fiber            [-]
+        U:      V*sqrt(1-b)                      [-]
+        km:     K_{ell-1}(W)                     [-]
+        k0:     K_ell(W)                         [-]
+        kp:     K_{ell+1}(W)                     [-]
+
+    Returns:
+        total power over core area               [-]
+    """
+    if np.isscalar(U) and np.isscalar(V):
+        if U == 0:
+            return np.float64(np.nan)
+        return np.float64(V**2 / U**2 * kp * km / k0**2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        val = V**2 / U**2 * kp * km / k0**2
+    return np.where(U == 0, np.nan, val)[()]
+
+
+def LP_irradiances(V, b, ell):
+    """
+    Calculate the core, cladding, and total irradiance for a step-index fiber.
+
+    This returns the same values as LP_core_irradiance, LP_clad_irradiance,
+    and LP_total_irradiance but evaluates each Bessel function only once.
+
+    Args:
+        V:      V-parameter for fiber            [-]
+        b:      normalized propagation constant  [-]
+        ell:    desired fiber mode               [-]
+
+    Returns:
+        core, cladding, and total power over core area    [-]
+    """
+    U, W = _UW(V, b)
+    jm, j0, jp = _jv_triplet(ell, U)
+    km, k0, kp = _kve_triplet(ell, W)
+
+    core = 1 - jp * jm / j0**2
+    clad = kp * km / k0**2 - 1
+    total = _LP_total_from_bessels(V, U, km, k0, kp)
+    return core, clad, total
 
 
 def LP_radial_field(V, b, ell, r_over_a):
@@ -382,14 +404,25 @@ def LP_radial_field(V, b, ell, r_over_a):
     Returns:
         normalized field at point r_over_a         [-]
     """
-    U = V * np.sqrt(1 - b)
-    W = V * np.sqrt(b)
-    r = abs(r_over_a)  # same value for negative radii
+    U, W = _UW(V, b)
+    r = np.abs(r_over_a)  # same value for negative radii
+
+    # K_ell(W) is shared by the cladding field and the normalization
+    km, k0, kp = _kve_triplet(ell, W)
 
-    A = special.jv(ell, U * r) / special.jv(ell, U)
-    B = special.kn(ell, W * r) / special.kn(ell, W)
-    values = np.where(r < 1, A, B)
-    return values / np.sqrt(LP_total_irradiance(V, b, ell))
+    if np.ndim(U) > 0:
+        A = special.jv(ell, U * r) / special.jv(ell, U)
+        B = special.kve(ell, W * r) / k0 * np.exp(W * (1 - r))
+        values = np.where(r < 1, A, B)
+    else:
+        # only evaluate each Bessel function where it is needed
+        core = r < 1
+        clad = ~core
+        values = np.empty(r.shape)
+        values[core] = special.jv(ell, U * r[core]) / special.jv(ell, U)
+        rc = r[clad]
+        values[clad] = special.kve(ell, W * rc) / k0 * np.exp(W * (1 - rc))
+    return values / np.sqrt(_LP_total_from_bessels(V, U, km, k0, kp))
 
 
 def LP_radial_irradiance(V, b, ell, r_over_a):
@@ -411,6 +444,8 @@ def LP_radial_irradiance(V, b, ell, r_over_a):
         normalized irradiance at points r_over_a   [-]
     """
     field = LP_radial_field(V, b, ell, r_over_a)
+    if isinstance(field, np.ndarray):
+        return np.square(field, out=field)  # field is not needed afterwards
     return field**2
 
 
@@ -428,9 +463,8 @@ def gaussian_envelope_Omega(V):
         Omega_over_core_radius                     [-]
     """
     b = LP_mode_value(V, 0, 1)
-    U = V * np.sqrt(1 - b)
-    W = V * np.sqrt(b)
-    Omega_over_a = special.jv(0, U) * V / U * special.kn(1, W) / special.kn(0, W)
+    U, W = _UW(V, b)
+    Omega_over_a = special.j0(U) * V / U * special.k1e(W) / special.k0e(W)
     return Omega_over_a
 
 
@@ -450,8 +484,8 @@ def gaussian_radial_irradiance(V, r_over_a):
     Returns:
         normalized irradiance at points r_over_a   [-]
     """
-    Omega_over_a = gaussian_envelope_Omega(V)
-    return 1 / Omega_over_a**2 * np.exp(-r_over_a**2 / Omega_over_a**2)
+    Omega2 = gaussian_envelope_Omega(V)**2
+    return np.exp(-r_over_a**2 / Omega2) / Omega2
 
 
 def transverse_misalignment_loss_db(w1, w2, u):
@@ -510,12 +544,12 @@ def longitudinal_misalignment_loss_db(n, w, D, lambda0):
     return 10 * np.log10(1 + dhat**2)
 
 
-def _bending_loss_db_scalar(n1, Delta, a, Rc, lambda0):
+def bending_loss_db(n1, Delta, a, Rc, lambda0):
     """
     Calculate the bending loss in dB/m.
 
-    The bending loss is given by eqn 10.29 in Ghatak.  This private method
-    only works for scalar values.
+    The bending loss is given by eqn 10.29 in Ghatak.  Any of the
+    arguments may be arrays.
 
     Args:
         a:        core radius                 [m]
@@ -527,43 +561,17 @@ def _bending_loss_db_scalar(n1, Delta, a, Rc, lambda0):
     Returns:
         bending loss in dB/m                  [1/m]
     """
-    k0 = 2 * np.pi / lambda0
-    V = k0 * a * n1 * np.sqrt(2 * Delta)
-    b = LP_mode_value(V, 0, 1)
-    if b is None:
-        return np.nan
-    U = V * np.sqrt(1 - b)
+    n1, Delta, a, Rc, lambda0 = (np.asarray(x, dtype=float) for x in (n1, Delta, a, Rc, lambda0))
+    k0a_n1 = 2 * np.pi / lambda0 * a * n1
+    V = k0a_n1 * np.sqrt(2 * Delta)
+    b = _LP_mode_value_array(V, 0, 1)
     W = V * np.sqrt(b)
-    val = 4.343 * np.sqrt(np.pi / 4 / a / Rc)
-    val *= (U / V / special.kn(1, W))**2
-    val *= W**-1.5
-    val *= np.exp(-2 * W**3 * Rc / 3 / k0**2 / a**3 / n1**2)
-    return val
+    K1 = special.k1e(W)
 
-
-def bending_loss_db(n1, Delta, a, Rc, lambda0):
-    """
-    Calculate the bending loss in dB/m.
-
-    This is a convenience method that works when a is an array.
-
-    Args:
-        a:        core radius                 [m]
-        n1:       core index                  [-]
-        Delta:    refractive index difference [-]
-        Rc:       radius of curvature in      [m]
-        lambda0:  wavelength in vacuum in     [m]
-
-    Returns:
-        bending loss in dB/m                  [1/m]
-    """
-    if np.isscalar(a):
-        alpha = _bending_loss_db_scalar(n1, Delta, a, Rc, lambda0)
-    else:
-        alpha = np.empty_like(a)
-        for i, aa in enumerate(a):
-            alpha[i] = _bending_loss_db_scalar(n1, Delta, aa, Rc, lambda0)
-    return alpha
+    # (U/V)**2 is just 1-b, the 2*W undoes the scaling of K1
+    prefactor = 4.343 * np.sqrt(np.pi / (4 * a * Rc))
+    exponent = 2 * W - 2 * W**3 * Rc / (3 * a * k0a_n1**2)
+    return prefactor * (1 - b) / (K1 * K1) * W**-1.5 * np.exp(exponent)
 
 
 def MFR(V):
@@ -582,7 +590,8 @@ def MFR(V):
     Returns:
         approximate mode field radius normalized by the core radius [--]
     """
-    return 0.65 + 1.619 * V**-1.5 + 2.879 * V**-6
+    t = V**-1.5
+    return 0.65 + t * (1.619 + 2.879 * t * t * t)
 
 
 def MFD(V):
@@ -600,32 +609,11 @@ def MFD(V):
     return 2 * MFR(V)
 
 
-def _PetermannW_scalar(V):
-    """
-    Calculate the Petermann-2 radius for a step-index fiber.
-
-    This private method only works when V is a scalar.
-
-    Args:
-        V:      V-parameter of the fiber                          [--]
-
-    Returns:
-        approximate Petermann-2 radius normalized by core radius  [--]
-    """
-    b = LP_mode_value(V, 0, 1)
-    if b is None:
-        return np.nan
-    U = V * np.sqrt(1 - b)
-    W = V * np.sqrt(b)
-    denom = W * special.jv(0, U)
-    return np.sqrt(2) * special.jv(1, U) / denom
-
-
 def PetermannW(V):
     """
     Calculate the Petermann-2 radius for a step-index fiber.
 
-    This is a convenience function that works when V is an array.
+    V may be a scalar or an array.
 
     Args:
         V:      V-parameter of the fiber                          [--]
@@ -633,13 +621,12 @@ def PetermannW(V):
     Returns:
         approximate Petermann-2 radius normalized by core radius  [--]
     """
-    if np.isscalar(V):
-        wp = _PetermannW_scalar(V)
-    else:
-        wp = np.empty_like(V)
-        for i, VV in enumerate(V):
-            wp[i] = _PetermannW_scalar(VV)
-    return wp
+    b = _LP_mode_value_array(V, 0, 1)
+    U, W = _UW(V, b)
+    denom = W * special.jv(0, U)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        wp = np.sqrt(2) * special.jv(1, U) / denom
+    return np.where(denom == 0, np.nan, wp)[()]
 
 
 def PetermannW_Approx(V):
@@ -659,46 +646,19 @@ def PetermannW_Approx(V):
     Returns:
         approximate Petermann-2 radius normalized by core radius  [--]
     """
-    return MFR(V) - 0.016 - 1.567 * V**-7
-
-
-def _V_d2bV_by_V_scalar(V, ell):
-    """
-    Calculate V*d^2(bV)/dV^2 for mode ell of a step-index fiber.
-
-    This private function only works for scalar values of V and ell. It
-    finds V*d^2(bV)/dV^2 for mode ell of a step-index fiber using eqn 10.14
-
-    Args:
-        V:   V-parameter of the fiber     [--]
-        ell: azimuthal mode number.
-
-    Returns:
-        V*d^2(bV)/dV^2                       [--]
-    """
-    b = LP_mode_value(V, ell, 1)
-    if b is None:
-        return 0
-
-    U = V * np.sqrt(1 - b)
-    W = V * np.sqrt(b)
-
-    kappa_ell = special.kn(ell, W)**2 / special.kn(ell - 1, W)
-    kappa_ell /= special.kn(ell + 1, W)
-    summ = 3 * W**2 - 2 * kappa_ell * (W**2 - U**2)
-    val = W * (W**2 + U**2 * kappa_ell) * (kappa_ell - 1)
-    val *= (special.kn(ell - 1, W) + special.kn(ell + 1, W))
-    val /= special.kn(ell, W)
-    summ += val
-    return 2 * U**2 * kappa_ell / V**2 / W**2 * summ
+    # MFR(V) - 0.016 - 1.567 * V**-7 with a single pow
+    t = V**-1.5
+    t4 = t * t * t * t
+    return 0.634 + 1.619 * t + t4 * (2.879 - 1.567 / V)
 
 
 def V_d2bV_by_V(V, ell):
     """
     Calculate V*d^2(bV)/dV^2 for mode ell of a step-index fiber.
 
-    This value is needed to determine the waveguide dispersion.  This
-    routine is a convenience function that works when V is an array.
+    This value is needed to determine the waveguide dispersion.  It
+    is found using eqn 10.14 and V may be a scalar or an array.  Zero
+    is returned when the mode is not guided.
 
     Args:
         V:      V-parameter of the fiber     [--]
@@ -707,14 +667,20 @@ def V_d2bV_by_V(V, ell):
     Returns:
         V*d^2(bV)/dV^2                       [--]
     """
-    if np.isscalar(V):
-        return _V_d2bV_by_V_scalar(V, ell)
+    V = np.asarray(V, dtype=float)
+    b = _LP_mode_value_array(V, ell, 1)
+    U, W = _UW(V, b)
 
-    v_by_v = np.empty_like(V)
-    for i, VV in enumerate(V):
-        v_by_v[i] = _V_d2bV_by_V_scalar(VV, ell)
+    # each Bessel function is needed twice, evaluate once
+    km, k0, kp = _kve_triplet(ell, W)
 
-    return v_by_v
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kappa_ell = k0**2 / km / kp
+        summ = 3 * W**2 - 2 * kappa_ell * (W**2 - U**2)
+        summ = summ + W * (W**2 + U**2 * kappa_ell) * (kappa_ell - 1) * (km + kp) / k0
+        val = 2 * U**2 * kappa_ell / V**2 / W**2 * summ
+    val = np.where(W == 0, np.nan, val)
+    return np.where(np.isnan(b), 0, val)[()]
 
 
 def V_d2bV_by_V_Approx(V):
@@ -756,12 +722,44 @@ def _FF_polar_x(kasin, V, ell, b):
     Returns:
         The calculated polar field distribution
     """
+    return _FF_polar_x_eval(kasin, ell, _FF_polar_x_consts(V, ell, b))
+
+
+def _FF_polar_x_consts(V, ell, b):
+    """
+    Terms of _FF_polar_x() that do not depend on the polar angle.
+
+    Args:
+        V: normalized frequency parameter of the fiber.
+        ell: azimuthal mode number.
+        b: normalized propagation constant.
+
+    Returns:
+        tuple (Vb**2, Vb*J_{ell+1}(Vb)/J_ell(Vb), V**2*b) where Vb = V*sqrt(1-b)
+    """
     Vb = V * np.sqrt(1 - b)
-    ell1 = ell + 1
+    coeff = Vb * special.jv(ell + 1, Vb) / special.jv(ell, Vb)
+    return Vb**2, coeff, V**2 * b
 
-    Flnumer = kasin * special.jv(ell1, kasin) - Vb * special.jv(ell1, Vb) * \
-        (special.jv(ell, kasin) / special.jv(ell, Vb))
-    Fldenom = (Vb**2 - kasin**2) * (V**2 * b + kasin**2)
+
+def _FF_polar_x_eval(kasin, ell, consts):
+    """
+    Evaluate _FF_polar_x() using constants from _FF_polar_x_consts().
+
+    Args:
+        kasin: wavenumber * fiber radius * sin(theta).
+        ell: azimuthal mode number.
+        consts: tuple returned by _FF_polar_x_consts().
+
+    Returns:
+        The calculated polar field distribution
+    """
+    Vb2, coeff, V2b = consts
+
+    # group the scalar factors so each array is traversed as few times as possible
+    kasin2 = kasin * kasin
+    Flnumer = kasin * special.jv(ell + 1, kasin) - coeff * special.jv(ell, kasin)
+    Fldenom = (Vb2 - kasin2) * (V2b + kasin2)
 
     return Flnumer / Fldenom
 
@@ -776,6 +774,12 @@ def FF_irradiance_x(r, theta, phi, ell, lambda0, a, V, b):
     The magnitude of the field is squared and normalized by the square
     of the electric field magnitude.
 
+    theta and phi broadcast against each other.  The Bessel functions only
+    depend on theta, so passing theta with shape (Nθ,) and phi with shape
+    (Nφ, 1) gives an (Nφ, Nθ) grid for the cost of Nθ Bessel evaluations.
+    Full meshgrid arrays work too and are reduced to the distinct values
+    of theta internally.
+
     Args:
         r: radial distance from the fiber axis (microns).
         theta: polar angle in radians.
@@ -790,9 +794,16 @@ def FF_irradiance_x(r, theta, phi, ell, lambda0, a, V, b):
         The irradiance pattern as a function of r, theta, and phi.
     """
     k = 2 * np.pi / lambda0
-    kasin = k*a * np.sin(theta)
-    FF_ell = _FF_polar_x(kasin, V, ell, b)
-    FF = FF_ell * (k * a * V)**2 * np.cos(ell * phi) / (k * r)
+    if np.ndim(theta) > 1:
+        # (theta, phi) grids repeat each polar angle along the phi axis,
+        # so evaluate the Bessel functions only once per distinct angle
+        theta_u, inverse = np.unique(theta, return_inverse=True)
+        FF_ell = _FF_polar_x(k*a * np.sin(theta_u), V, ell, b)[inverse]
+        FF_ell = FF_ell.reshape(np.shape(theta))
+    else:
+        kasin = k*a * np.sin(theta)
+        FF_ell = _FF_polar_x(kasin, V, ell, b)
+    FF = FF_ell * ((k * a * V)**2 / (k * r)) * np.cos(ell * phi)
     return FF**2
 
 
@@ -820,7 +831,7 @@ def FF_polar_irradiance_x(r, theta, ell, lambda0, a, V, b):
     k = 2 * np.pi / lambda0
     kasin = k*a * np.sin(theta)
     FF_ell = _FF_polar_x(kasin, V, ell, b)
-    return np.pi * (FF_ell * (k * a * V)**2 / (k * r))**2
+    return np.pi * (FF_ell * ((k * a * V)**2 / (k * r)))**2
 
 
 def _FF_node_polar_angle(V, ell, em):
@@ -896,18 +907,20 @@ def _FF_node_polar_angle(V, ell, em):
     # would have multiple zeros in this range, which would lead to an error condition.
 
     ntry = 3000
-    f1 = _FF_polar_x(lo, V, ell, b)
-    f2 = _FF_polar_x(hi, V, ell, b)
+    # the Bessel functions of Vb are the same at every trial angle
+    consts = _FF_polar_x_consts(V, ell, b)
+    f1 = _FF_polar_x_eval(lo, ell, consts)
+    f2 = _FF_polar_x_eval(hi, ell, consts)
 
     for j in range(ntry):
         if f1*f2 < 0.0:
             break
         hi = (j+1)*inc
-        f2 = _FF_polar_x(hi, V, ell, b)
+        f2 = _FF_polar_x_eval(hi, ell, consts)
     else:
         raise StopIteration(r'No sign change in %d iterations' % ntry)
 
-    return scipy.optimize.brentq(_FF_polar_x, lo, hi, args=(V, ell, b))  # kasinThetaN
+    return scipy.optimize.brentq(_FF_polar_x_eval, lo, hi, args=(ell, consts))  # kasinThetaN
     # We do not suppress any errors from this subroutine, as we want to know if it's working
 
 
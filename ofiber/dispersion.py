@@ -46,6 +46,8 @@ def Waveguide_Dispersion(n_core, n_clad, r_core, λ, q=1e20, approx=False):
     allow parabolic (q=2) or triangular (q=1) profiles.
 
     The waveguide dispersion is for the fundamental mode of the fiber.
+    λ (and n_core) may be arrays, in which case the whole dispersion
+    curve is found with a single vectorized mode calculation.
 
     The approximation is reasonably good for values from 1.6<V<2.6
 
@@ -61,8 +63,9 @@ def Waveguide_Dispersion(n_core, n_clad, r_core, λ, q=1e20, approx=False):
         waveguide dispersion [s/m**2]   (multiply by 1e6 to get ps/(km*nm))
     """
     c = scipy.constants.speed_of_light
-    Δ = (n_core**2 - n_clad**2) / 2 / n_core**2
-    V = 2 * np.pi / λ * r_core * np.sqrt(n_core**2 - n_clad**2)
+    NA2 = n_core**2 - n_clad**2
+    Δ = NA2 / 2 / n_core**2
+    V = 2 * np.pi / λ * r_core * np.sqrt(NA2)
 
     # Find the equivalent step index fiber parameters
     esi_Delta = ofb.esi_Delta(Δ, q)
@@ -81,6 +84,7 @@ def Dispersion(core, n_clad, r_core, λ, q=1e20, approx=False):
 
     This is a convenience routine that finds the total dispersion for
     a specific type of core glass and refractive index difference.
+    λ may be an array of wavelengths.
 
     The returned dispersion is in units of [s/m**2].  To convert to
     [ps/km/nm], multiply by 1e6.
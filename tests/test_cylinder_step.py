@@ -0,0 +1,166 @@
+# pylint: disable=invalid-name
+"""Tests for the mode solvers and irradiances in ofiber.cylinder_step."""
+import numpy as np
+import ofiber
+
+
+def test_total_irradiance_U_zero():
+    """U == 0 (b == 1) gives nan of the same type for scalars and arrays."""
+    total = ofiber.LP_total_irradiance(2.0, 1.0, 0)
+    assert isinstance(total, np.float64)
+    assert np.isnan(total)
+
+    total = ofiber.LP_total_irradiance(np.array([2.0, 2.0]), np.array([1.0, 0.5]), 0)
+    assert total.shape == (2,)
+    assert np.isnan(total[0])
+    assert np.isfinite(total[1])
+
+    total = ofiber.LP_irradiances(2.0, 1.0, 0)[2]
+    assert isinstance(total, np.float64)
+    assert np.isnan(total)
+
+
+def test_total_irradiance_scalar_type():
+    """Scalar arguments give a numpy scalar, like the array path does."""
+    total = ofiber.LP_total_irradiance(2.0, 0.5, 0)
+    assert isinstance(total, np.float64)
+    assert np.isclose(total, ofiber.LP_total_irradiance(np.array([2.0]), 0.5, 0)[0])
+
+
+def test_V_d2bV_by_V_list():
+    """A plain list of V values works like an array."""
+    result = ofiber.V_d2bV_by_V([2.0, 2.5], 0)
+    expected = [ofiber.V_d2bV_by_V(2.0, 0), ofiber.V_d2bV_by_V(2.5, 0)]
+    assert result.shape == (2,)
+    np.testing.assert_allclose(result, expected, rtol=1e-10)
+    np.testing.assert_allclose(result, [0.462, 0.150], atol=5e-4)
+
+
+def test_bending_loss_db_lists():
+    """Lists are accepted and the arguments broadcast together."""
+    a = [4e-6, 5e-6]
+    result = ofiber.bending_loss_db(1.46, 0.003, a, 0.01, 1.55e-6)
+    expected = [ofiber.bending_loss_db(1.46, 0.003, aa, 0.01, 1.55e-6) for aa in a]
+    assert result.shape == (2,)
+    np.testing.assert_allclose(result, expected, rtol=1e-10)
+    np.testing.assert_allclose(result, [791.13, 111.83], rtol=1e-4)
+
+    Rc = [[0.01], [0.02], [0.03]]
+    result = ofiber.bending_loss_db(1.46, 0.003, a, Rc, [1.50e-6, 1.55e-6])
+    assert result.shape == (3, 2)
+    for i, rc in enumerate([0.01, 0.02, 0.03]):
+        for j, (aa, lam) in enumerate(zip(a, [1.50e-6, 1.55e-6])):
+            expected = ofiber.bending_loss_db(1.46, 0.003, aa, rc, lam)
+            np.testing.assert_allclose(result[i, j], expected, rtol=1e-10)
+
+    assert np.ndim(ofiber.bending_loss_db(1.46, 0.003, 4e-6, 0.01, 1.55e-6)) == 0
+
+
+def test_chandrupatla_no_warnings():
+    """An infinite f (as at a pole of eqn 8.40) does not leak RuntimeWarnings."""
+    # pylint: disable=import-outside-toplevel
+    import warnings
+    from ofiber._lp_modes import _chandrupatla
+
+    def f(x, _idx):
+        return np.where(x < 0.4, x - 0.3, np.inf)
+
+    a, b = np.zeros(3), np.ones(3)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        root = _chandrupatla(f, a, b, f(a, None), f(b, None))
+    np.testing.assert_allclose(root, 0.3, atol=1e-11)
+
+
+V_GRID = np.array([0.5, 1.2, 2.0, 2.404, 2.406, 3.5, 5.0, 7.3, 11.0, 16.0, 25.0])
+
+
+def scalar_b(V, ell, em):
+    """Return the scalar brenth result with None mapped to nan."""
+    b = ofiber.LP_mode_value(float(V), ell, em)
+    return np.nan if b is None else b
+
+
+def test_LP_mode_value_array_matches_scalar():
+    """Array V gives the scalar brenth roots element by element."""
+    for ell in range(4):
+        for em in range(1, 4):
+            b = ofiber.LP_mode_value(V_GRID, ell, em)
+            expected = [scalar_b(V, ell, em) for V in V_GRID]
+            assert b.shape == V_GRID.shape
+            np.testing.assert_allclose(b, expected, rtol=0, atol=1e-10)
+
+
+def test_LP_mode_value_unguided():
+    """Unguided modes are None for scalars and nan for arrays."""
+    assert ofiber.LP_mode_value(2.0, 1, 1) is None
+    assert ofiber.LP_mode_value(-1.0, 0, 1) is None
+    b = ofiber.LP_mode_value(np.array([2.0, -1.0, 3.0]), 1, 1)
+    assert np.isnan(b[0]) and np.isnan(b[1]) and np.isfinite(b[2])
+
+
+def test_LP_mode_value_broadcast():
+    """V, ell and em broadcast together."""
+    ell = np.array([0, 1, 2, 3])
+    em = np.array([[1], [2]])
+    b = ofiber.LP_mode_value(V_GRID[:, np.newaxis, np.newaxis], ell, em)
+    assert b.shape == (len(V_GRID), 2, 4)
+    for i, V in enumerate(V_GRID):
+        for j, mm in enumerate(em.ravel()):
+            for k, ll in enumerate(ell):
+                np.testing.assert_allclose(b[i, j, k], scalar_b(V, ll, mm), rtol=0, atol=1e-10)
+
+
+def test_LP01_small_V():
+    """A tiny V pins LP01 Newton at the bracket end and falls back cleanly."""
+    # pylint: disable=import-outside-toplevel
+    from ofiber._lp_modes import _LP01_mode_value, _LP_mode_brackets
+
+    V = np.array([0.003, 0.006, 0.02])
+    lo, hi = _LP_mode_brackets(V, 0, 1)
+    b = _LP01_mode_value(V, lo[:, 0], hi[:, 0])
+    assert np.all(np.isnan(b))
+
+    V = np.concatenate((V, V_GRID))
+    b = ofiber.LP_mode_value(V, 0, 1)
+    np.testing.assert_allclose(b, [scalar_b(v, 0, 1) for v in V], rtol=0, atol=1e-10)
+    assert np.isnan(ofiber.bending_loss_db(1.46, 0.003, 1e-8, 0.01, 1.55e-6))
+
+
+def test_LP_mode_values_array():
+    """Array V gives one row per V, padded with nan after the last mode."""
+    V = np.concatenate((V_GRID, [-1.0, 0.0]))
+    b = ofiber.LP_mode_values(V, 1)
+    assert b.shape == (len(V), 9)
+    for i, VV in enumerate(V):
+        expected = ofiber.LP_mode_values(float(VV), 1)
+        n = len(expected)
+        np.testing.assert_allclose(b[i, :n], expected, rtol=0, atol=1e-10)
+        assert np.all(np.isnan(b[i, n:]))
+
+    b = ofiber.LP_mode_values(V.reshape(-1, 1), 2)
+    assert b.shape == (len(V), 1, 9)
+
+
+def test_LP_mode_sweep():
+    """LP_mode_sweep matches stacking LP_mode_values over ell."""
+    b = ofiber.LP_mode_sweep(V_GRID, 4)
+    assert b.shape == (len(V_GRID), 5, 9)
+    for ell in range(5):
+        np.testing.assert_allclose(b[:, ell], ofiber.LP_mode_values(V_GRID, ell),
+                                   rtol=0, atol=1e-10)
+    assert ofiber.LP_mode_sweep(5.0, 2).shape == (3, 9)
+
+
+def test_LP_irradiances():
+    """LP_irradiances matches the separate core, cladding and total functions."""
+    for ell in range(3):
+        V = V_GRID[V_GRID > 4]
+        b = ofiber.LP_mode_value(V, ell, 1)
+        core, clad, total = ofiber.LP_irradiances(V, b, ell)
+        np.testing.assert_allclose(core, ofiber.LP_core_irradiance(V, b, ell), rtol=1e-12)
+        np.testing.assert_allclose(clad, ofiber.LP_clad_irradiance(V, b, ell), rtol=1e-12)
+        np.testing.assert_allclose(total, ofiber.LP_total_irradiance(V, b, ell), rtol=1e-12)
+        for i, VV in enumerate(V):
+            values = ofiber.LP_irradiances(VV, b[i], ell)
+            np.testing.assert_allclose(values, (core[i], clad[i], total[i]), rtol=1e-12)